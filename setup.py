@@ -33,5 +33,10 @@ setup(
         'Issue Tracker': 'https://github.com/homeroff/uzum-payments/issues',
         'Documentation': 'https://www.inplat-tech.ru/docs/checkout/'
     },
-    install_requires=['requests'], 
+    install_requires=['requests'],
+    extras_require={
+        'brotli': ['brotli'],
+        'orjson': ['orjson'],
+        'http2': ['httpx[http2]'],
+    },
 )
\ No newline at end of file
@@ -1,4 +1,5 @@
 from .client import ApiClient
+from .metrics import PerformanceMetrics
 from .receipt_producer.client import ReceiptApiClient
 
-__all__ = ['ApiClient', 'ReceiptApiClient']
+__all__ = ['ApiClient', 'PerformanceMetrics', 'ReceiptApiClient']
@@ -0,0 +1,86 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from uzum_payments.const import CACHE_MAX_SIZE
+
+
+class ResponseCache:
+    """Thread-safe LRU cache of serialized API responses with per-entry TTL and tag invalidation"""
+
+    def __init__(self, max_size: int = CACHE_MAX_SIZE) -> None:
+        """
+        :param max_size: Максимальное количество хранимых ответов.
+        """
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._invalidated = OrderedDict()  # Tag -> generation of its last invalidation
+        self._forgotten_generation = 0  # Latest generation dropped from _invalidated
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, _, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def generation(self) -> int:
+        """
+        Возвращает текущее поколение кэша. Его нужно получить до запроса и передать в set.
+        """
+        return self._generation
+
+    def is_current(self, tag: Hashable, generation: int) -> bool:
+        """
+        Проверяет, что тег не сбрасывался после получения поколения generation.
+        """
+        with self._lock:
+            return self._is_current(tag, generation)
+
+    def _is_current(self, tag: Hashable, generation: int) -> bool:
+        return self._invalidated.get(tag, self._forgotten_generation) <= generation
+
+    def set(self, key: Hashable, value: Any, ttl: float, tag: Hashable = None, generation: int = None) -> None:
+        """
+        :param generation: Поколение, полученное до запроса. Ответ не сохраняется,
+                  если тег был сброшен после этого, так как он мог устареть.
+        """
+        with self._lock:
+            if generation is not None and not self._is_current(tag, generation):
+                return
+
+            self._entries[key] = (time.monotonic() + ttl, tag, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, tag: Hashable) -> None:
+        with self._lock:
+            self._generation += 1
+            self._invalidated[tag] = self._generation
+            self._invalidated.move_to_end(tag)
+            while len(self._invalidated) > self.max_size:
+                _, self._forgotten_generation = self._invalidated.popitem(last=False)
+
+            for key in [key for key, (_, entry_tag, _) in self._entries.items() if entry_tag == tag]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._forgotten_generation = self._generation  # Responses requested before clear() are stale
+            self._invalidated.clear()
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,22 +1,30 @@
 import base64
-import json
 import logging
-from typing import Optional, Any, Union
-
-import aiohttp
-import requests
+from typing import TYPE_CHECKING, Optional, Any, Mapping, Union
 
 from cryptography.hazmat.primitives.asymmetric import ec
 from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.primitives import hashes
 import hashlib
 
-from .connection import Connection
-from .const import BASE_CHECKOUT_URL
+if TYPE_CHECKING:
+    import aiohttp
+    import httpx
+    import requests
+
+from .cache import ResponseCache
+from .connection import Connection, check_transport, create_session, freeze_headers
+from .const import (BASE_CHECKOUT_URL, DEFAULT_MAX_CONNECTIONS, DEFAULT_MAX_RETRIES, ORDER_STATUS_CACHE_TTL,
+                    OPERATION_STATE_CACHE_TTL, BINDINGS_CACHE_TTL)
 
 
 class ApiClient(Connection):
     """Performs requests to the Uzum Checkout API"""
+    __slots__ = ('terminal_id', 'content_language', 'signature_private_key', 'signature_private_key_password',
+                 'merchant_access_token', 'fingerprint', 'api_key', 'base_url', '_url_register', '_url_merchant_pay',
+                 '_url_get_order_status', '_url_get_operation_state', '_url_complete', '_url_refund', '_url_reverse',
+                 '_url_get_bindings', '_private_key')
+
     def __init__(self,
                  terminal_id: str,
                  signature_private_key: str = None,
@@ -26,8 +34,12 @@ class ApiClient(Connection):
                  fingerprint: Optional[str] = None,
                  api_key: Optional[str] = None,
                  base_url: Optional[str] = BASE_CHECKOUT_URL,
-                 session: Union[aiohttp.ClientSession, requests.Session] = None,
-                 is_async: bool = False, ) -> None:
+                 session: Union['aiohttp.ClientSession', 'requests.Session', 'httpx.AsyncClient'] = None,
+                 is_async: bool = False,
+                 max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 use_cache: bool = False,
+                 http2: bool = False,
+                 max_retries: int = DEFAULT_MAX_RETRIES, ) -> None:
         """
         :param terminal_id: Идентификатор терминала
         :param signature_private_key: Путь к private key мерчанта. В каждый запрос от мерчанта в Uzum checkout необходимо добавить заголовок X-Signature.
@@ -44,45 +56,66 @@ class ApiClient(Connection):
         :param base_url: URL-адрес API.
         :param session: Экземпляр сессии.
         :param is_async: Асинхронное выполнение запросов.
+        :param max_connections: Размер пула соединений сессии, создаваемой по умолчанию.
+        :param use_cache: Кэшировать ответы get_order_status, get_operation_state и get_bindings на короткое время.
+        :param http2: Использовать httpx.AsyncClient с HTTP/2 вместо aiohttp (только для асинхронного клиента).
+        :param max_retries: Количество повторов запросов статуса и связок при ответах 502/503/504
+                  и сетевых ошибках. Платежные операции никогда не повторяются.
         """
 
+        check_transport(is_async, http2, session)
+        if max_retries < 0:
+            raise ValueError('max_retries must not be negative')
+
         self.terminal_id = terminal_id
         self.content_language = content_language
-        self.headers = {
+
+        headers = {
             'Content-Language': self.content_language,
             'X-Terminal-Id': self.terminal_id,
             'Accept': 'application/json',
-            'Accept-Encoding': 'gzip,deflate,sdch',
             'Cache-Control': 'no-cache',
             'Content-Type': 'application/json',
         }
 
-        if signature_private_key:
-            self.signature_private_key = signature_private_key
-            self.signature_private_key_password = signature_private_key_password
-            self.headers.update({'X-Signature': ''})
+        self.signature_private_key = signature_private_key
+        self.signature_private_key_password = signature_private_key_password
+        self._private_key = (_load_private_key(signature_private_key, signature_private_key_password)
+                             if signature_private_key else None)
 
         if merchant_access_token:
             self.merchant_access_token = merchant_access_token
-            self.headers.update({'X-Merchant-Access-Token': self.merchant_access_token})
+            headers.update({'X-Merchant-Access-Token': self.merchant_access_token})
 
         if fingerprint:
             self.fingerprint = fingerprint
-            self.headers.update({'X-Fingerprint': self.fingerprint})
+            headers.update({'X-Fingerprint': self.fingerprint})
 
         if api_key:
             self.api_key = api_key
-            self.headers.update({'X-API-Key': self.api_key})
+            headers.update({'X-API-Key': self.api_key})
+
+        self.headers = freeze_headers(headers, is_async, http2)
+
+        self.base_url = base_url if base_url.endswith('/') else base_url + '/'
 
-        self.base_url = base_url
-        if not self.base_url[-1] == '/':
-            self.base_url += '/'
+        self._url_register = f"{self.base_url}payment/register"
+        self._url_merchant_pay = f"{self.base_url}payment/merchantPay"
+        self._url_get_order_status = f"{self.base_url}payment/getOrderStatus"
+        self._url_get_operation_state = f"{self.base_url}payment/getOperationState"
+        self._url_complete = f"{self.base_url}acquiring/complete"
+        self._url_refund = f"{self.base_url}acquiring/refund"
+        self._url_reverse = f"{self.base_url}acquiring/reverse"
+        self._url_get_bindings = f"{self.base_url}acquiring/getBindings"
 
-        self.session = session or (aiohttp.ClientSession() if is_async else requests.Session())
+        self.session = session or create_session(is_async, max_connections, http2)
         self.is_async = is_async
         self.logger = logging.getLogger(__name__)
 
-        Connection.__init__(self, self.session, self.headers, self.logger, self.is_async)
+        self.cache = ResponseCache() if use_cache else None
+
+        Connection.__init__(self, self.session, self.headers, self.logger, self.is_async, self.cache, http2,
+                            max_retries)
 
     @classmethod
     def Async(cls,
@@ -94,7 +127,11 @@ class ApiClient(Connection):
               fingerprint: Optional[str] = None,
               api_key: Optional[str] = None,
               base_url: Optional[str] = BASE_CHECKOUT_URL,
-              session: Union[aiohttp.ClientSession, requests.Session] = None,):
+              session: Union['aiohttp.ClientSession', 'requests.Session', 'httpx.AsyncClient'] = None,
+              max_connections: int = DEFAULT_MAX_CONNECTIONS,
+              use_cache: bool = False,
+              http2: bool = False,
+              max_retries: int = DEFAULT_MAX_RETRIES, ):
         """
         :param terminal_id: Идентификатор терминала
         :param signature_private_key: Путь к private key мерчанта. В каждый запрос от мерчанта в Uzum checkout необходимо добавить заголовок X-Signature.
@@ -110,6 +147,11 @@ class ApiClient(Connection):
         :param api_key: Уникальный ключ, который используется для аутентификации запросов.
         :param base_url: URL-адрес API.
         :param session: Экземпляр сессии.
+        :param max_connections: Размер пула соединений сессии, создаваемой по умолчанию.
+        :param use_cache: Кэшировать ответы get_order_status, get_operation_state и get_bindings на короткое время.
+        :param http2: Использовать httpx.AsyncClient с HTTP/2 вместо aiohttp (только для асинхронного клиента).
+        :param max_retries: Количество повторов запросов статуса и связок при ответах 502/503/504
+                  и сетевых ошибках. Платежные операции никогда не повторяются.
         """
         return cls(terminal_id=terminal_id,
                    signature_private_key=signature_private_key,
@@ -120,7 +162,11 @@ class ApiClient(Connection):
                    api_key=api_key,
                    base_url=base_url,
                    session=session,
-                   is_async=True)
+                   is_async=True,
+                   max_connections=max_connections,
+                   use_cache=use_cache,
+                   http2=http2,
+                   max_retries=max_retries)
 
     def register(self,
                  amount: Optional[float],
@@ -152,32 +198,22 @@ class ApiClient(Connection):
         :param session_timeout_secs: Максимальная продолжительность сессии в секундах
         :param kwargs:
         """
-        url = f"{self.base_url}payment/register"
-
-        if payment_params is None:
-            payment_params = {'payType': 'ONE_STEP'}
-
-        data = {
-            "amount": amount,
-            "clientId": client_id,
-            "currency": currency,
-            "paymentDetails": payment_details,
-            "orderNumber": order_number,
-            "successUrl": success_url,
-            "failureUrl": failure_url,
-            "viewType": view_type,
-            "merchantParams": merchant_params,
-            "sessionTimeoutSecs": session_timeout_secs,
-        }
-
-        if payment_params is None:
-            data.update({"paymentParams": {'payType': 'ONE_STEP'}})
-        else:
-            data.update({"paymentParams": payment_params})
-
-        self._update_headers(data)
-
-        return self._request_model(url, data={**data, **kwargs})
+        data = {key: value for key, value in (
+            ("amount", amount),
+            ("clientId", client_id),
+            ("currency", currency),
+            ("paymentDetails", payment_details),
+            ("orderNumber", order_number),
+            ("successUrl", success_url),
+            ("failureUrl", failure_url),
+            ("viewType", view_type),
+            ("merchantParams", merchant_params),
+            ("sessionTimeoutSecs", session_timeout_secs),
+            ("paymentParams", payment_params if payment_params is not None else {'payType': 'ONE_STEP'}),
+        ) if value is not None}
+        data.update(kwargs)
+
+        return self._request_model(self._url_register, data=data, invalidates=('client', client_id))
 
     def merchant_pay(self, process_data: dict[dict[str, Any]], order_id: str) -> dict:
         """
@@ -187,15 +223,12 @@ class ApiClient(Connection):
         :param process_data: Данные способа оплаты
         :param order_id: Идентификатор заказа
         """
-        url = f"{self.base_url}payment/merchantPay"
         data = {
             'processData': process_data,
             'orderId': order_id,
         }
 
-        self._update_headers(data)
-
-        return self._request_model(url, data=data)
+        return self._request_model(self._url_merchant_pay, data=data, invalidates=('order', order_id))
 
     def get_order_status(self, order_id: str) -> dict:
         """
@@ -204,14 +237,12 @@ class ApiClient(Connection):
 
         :param order_id: Идентификатор заказа
         """
-        url = f"{self.base_url}payment/getOrderStatus"
         data = {
             'orderId': order_id,
         }
 
-        self._update_headers(data)
-
-        return self._request_model(url, data=data)
+        return self._request_model(self._url_get_order_status, data=data, cache_ttl=ORDER_STATUS_CACHE_TTL,
+                                   cache_tag=('order', order_id))
 
     def get_operation_state(self, operation_id: str) -> dict:
         """
@@ -220,14 +251,12 @@ class ApiClient(Connection):
 
         :param operation_id: Идентификатор операции на стороне чекаута
         """
-        url = f"{self.base_url}payment/getOperationState"
         data = {
             'operationId': operation_id,
         }
 
-        self._update_headers(data)
-
-        return self._request_model(url, data=data)
+        return self._request_model(self._url_get_operation_state, data=data, cache_ttl=OPERATION_STATE_CACHE_TTL,
+                                   cache_tag=('operation', operation_id))
 
     def complete(self, order_id: str, amount: int) -> dict:
         """
@@ -237,15 +266,12 @@ class ApiClient(Connection):
         :param order_id: Идентификатор заказа
         :param amount: Сумма для комплита в тийинах
         """
-        url = f"{self.base_url}acquiring/complete"
         data = {
             'orderId': order_id,
             'amount': amount,
         }
 
-        self._update_headers(data)
-
-        return self._request_model(url, data=data)
+        return self._request_model(self._url_complete, data=data, invalidates=('order', order_id))
 
     def refund(self, order_id: str, amount: int) -> dict:
         """
@@ -255,15 +281,12 @@ class ApiClient(Connection):
         :param order_id: Идентификатор заказа
         :param amount: Сумма для комплита в тийинах
         """
-        url = f"{self.base_url}acquiring/refund"
         data = {
             'orderId': order_id,
             'amount': amount,
         }
 
-        self._update_headers(data)
-
-        return self._request_model(url, data=data)
+        return self._request_model(self._url_refund, data=data, invalidates=('order', order_id))
 
     def reverse(self, order_id: str, amount: int) -> dict:
         """
@@ -274,15 +297,12 @@ class ApiClient(Connection):
         :param order_id: Идентификатор заказа
         :param amount: Сумма для комплита в тийинах
         """
-        url = f"{self.base_url}acquiring/reverse"
         data = {
             'orderId': order_id,
             'amount': amount,
         }
 
-        self._update_headers(data)
-
-        return self._request_model(url, data=data)
+        return self._request_model(self._url_reverse, data=data, invalidates=('order', order_id))
 
     def get_bindings(self, client_id: str) -> dict:
         """
@@ -291,31 +311,32 @@ class ApiClient(Connection):
 
         :param client_id: Метод получения списка привязок пользователя
         """
-        url = f"{self.base_url}acquiring/getBindings"
         data = {
             'clientId': client_id,
         }
 
-        self._update_headers(data)
-
-        return self._request_model(url, data=data)
+        return self._request_model(self._url_get_bindings, data=data, cache_ttl=BINDINGS_CACHE_TTL,
+                                   cache_tag=('client', client_id))
 
     def __repr__(self) -> str:
         return '<Uzum Payments Client async={}>'.format(self.is_async)
 
-    def _update_headers(self, data: dict) -> None:
-        if self.headers.get('X-Signature') is not None:
-            signature = _generate_signature(self.signature_private_key, data, self.signature_private_key_password)
-            self.headers.update({'X-Signature': signature})
+    def _request_headers(self, body: Union[bytes, None]) -> Mapping[str, str]:
+        if self._private_key is None or body is None:
+            return self.headers
 
+        signature = _generate_signature(self._private_key, body)
+        return {**self.headers, 'X-Signature': signature}
 
-def _generate_signature(signature_private_key: str, data: dict, signature_private_key_password: bytes = None):
-    request_data = json.dumps(data)
-    hash_object = hashlib.sha256(request_data.encode())
-    hash_hex = hash_object.hexdigest()
 
+def _load_private_key(signature_private_key: str, signature_private_key_password: bytes = None):
     with open(signature_private_key, 'rb') as key_file:
-        private_key = serialization.load_pem_private_key(key_file.read(), password=signature_private_key_password)
+        return serialization.load_pem_private_key(key_file.read(), password=signature_private_key_password)
+
+
+def _generate_signature(private_key: ec.EllipticCurvePrivateKey, body: bytes):
+    hash_object = hashlib.sha256(body)
+    hash_hex = hash_object.hexdigest()
 
     signature = private_key.sign(
         hash_hex.encode(),
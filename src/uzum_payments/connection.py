@@ -1,89 +1,467 @@
 import asyncio
+import atexit
+import bisect
 import json
 import logging
-from typing import Union
+import random
+import threading
+import time
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Awaitable, Hashable, Mapping, Optional, Union
 
-import aiohttp
-import requests
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 from uzum_payments import exceptions
-from uzum_payments.const import REQUEST_LOG
+from uzum_payments.cache import ResponseCache
+from uzum_payments.metrics import PerformanceMetrics
+from uzum_payments.const import (REQUEST_LOG, DNS_CACHE_TTL, KEEPALIVE_TIMEOUT, RETRY_STATUSES,
+                                 RETRY_AFTER_MAX_DELAY, RETRY_BACKOFF_FACTOR)
+
+if TYPE_CHECKING:
+    import aiohttp
+    import requests
+
+
+if orjson is not None:
+    json_dumps = orjson.dumps
+    json_loads = orjson.loads
+else:
+    def json_dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode()
+
+    json_loads = json.loads
 
 
 class Connection:
-    def __init__(self, session: Union[aiohttp.ClientSession, requests.Session], headers: dict, logger: logging.Logger, is_async: bool):
+    __slots__ = ('session', 'headers', 'logger', 'is_async', 'cache', 'http2', 'max_retries',
+                 'metrics', '_session_request', '_debug', '_inflight', '_inflight_lock')
+
+    def __init__(self, session: Union['aiohttp.ClientSession', 'requests.Session'], headers: Mapping[str, str], logger: logging.Logger, is_async: bool,
+                 cache: ResponseCache = None, http2: bool = False, max_retries: int = 0):
         self.session = session
         self.headers = headers
         self.logger = logger
-        self.REQUEST_LOG = REQUEST_LOG
         self.is_async = is_async
+        self.cache = cache
+        self.http2 = http2
+        self.max_retries = max_retries
+        self.metrics = PerformanceMetrics()
+        self._session_request = session.request
+        self._debug = logger.debug
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
 
     def close(self):
+        if self.http2:
+            return self.session.aclose()
+
+        with _SHARED_SESSIONS_LOCK:
+            if self.session in _SHARED_SESSIONS.values():  # Shared sessions live until the interpreter exits
+                return None
+
         return self.session.close()
 
-    def _raise_for_status(self, resp: Union[aiohttp.ClientResponse, requests.Response], text: str,
-                          method: str = None) -> dict:
+    async def batch(self, *awaitables: Awaitable) -> list:
+        """
+        Конкурентно выполняет несколько запросов асинхронного клиента через общую сессию.
+        Исключения возвращаются в списке результатов на месте соответствующего запроса.
+
+        Пример: await client.batch(client.get_order_status(a), client.get_order_status(b))
+        """
+        self._require_async()
+        return await asyncio.gather(*awaitables, return_exceptions=True)
+
+    def _require_async(self) -> None:
+        if not self.is_async:
+            raise ValueError('Batch requests are only available for the async client')
+
+    def _raise_for_status(self, resp: Union['aiohttp.ClientResponse', 'requests.Response'], status_code: int,
+                          body: Union[bytes, str], method: str = None) -> dict:
         try:
-            data = json.loads(text)
+            data = json_loads(body)
+        except ValueError as e:
+            if status_code == 200:
+                raise exceptions.UnexpectedError({'message': str(e)}, None) from e
 
-        except json.JSONDecodeError:
-            raise json.JSONDecodeError
+            # Error pages of proxies and load balancers are not JSON, dispatch them by the HTTP status
+            raise_error({'message': f'HTTP {status_code}: {_decode(body)}'}, None, status_code)
 
         error_code = data.get('errorCode')
-        status_code = resp.status if isinstance(resp, aiohttp.ClientResponse) else resp.status_code
 
-        self.logger.debug(self.REQUEST_LOG.format(method=method or resp.request_info.method, url=resp.url, text=text,
-                                                  status=error_code))
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self._debug(REQUEST_LOG.format(method=method or resp.request_info.method, url=resp.url,
+                                           text=_decode(body), status=error_code))
 
         if not error_code and status_code == 200:  # Request was successful
             return data
 
         raise_error(data, error_code, status_code)
 
-    def _request(self, url: str, data: dict = None, method: str = 'POST') -> dict:
+    def _request_headers(self, body: Union[bytes, None]) -> Mapping[str, str]:
+        return self.headers
+
+    def _request(self, url: str, body: bytes = None, method: str = 'POST', retry: bool = False) -> dict:
+        max_retries = self.max_retries if retry else 0
+        started = time.perf_counter_ns()
+        failed = True
+        try:
+            for attempt in range(max_retries + 1):
+                can_retry = attempt < max_retries
+                try:
+                    data = self._requests_request(url, body, method, can_retry)
+                    failed = False
+                    return data
+                except _RetryableResponse as e:
+                    delay = _retry_delay(attempt, e.retry_after)
+                except exceptions.NetworkError:
+                    if not can_retry:
+                        raise
+                    delay = _retry_delay(attempt)
+
+                time.sleep(delay)
+        finally:
+            self.metrics.record_request(time.perf_counter_ns() - started, failed)
+
+    def _requests_request(self, url: str, body: bytes = None, method: str = 'POST', can_retry: bool = False) -> dict:
+        import requests
+
         try:
-            with self.session.request(url=url, method=method, headers=self.headers, json=data) as resp:
-                return self._raise_for_status(resp, resp.text, method)
+            with self._session_request(url=url, method=method, headers=self._request_headers(body), data=body) as resp:
+                if can_retry and resp.status_code in RETRY_STATUSES:
+                    raise _RetryableResponse(resp.headers.get('Retry-After'))
+
+                return self._raise_for_status(resp, resp.status_code, resp.content, method)
         except requests.Timeout:
             raise exceptions.NotResponding
         except requests.ConnectionError:
             raise exceptions.NetworkError
 
-    async def _async_request(self, url: str, data: dict = None, method: str = 'POST') -> dict:
+    async def _async_request(self, url: str, body: bytes = None, method: str = 'POST', retry: bool = False) -> dict:
+        transport = self._httpx_request if self.http2 else self._aiohttp_request
+        max_retries = self.max_retries if retry else 0
+        started = time.perf_counter_ns()
+        failed = True
+        try:
+            for attempt in range(max_retries + 1):
+                can_retry = attempt < max_retries
+                try:
+                    data = await transport(url, body, method, can_retry)
+                    failed = False
+                    return data
+                except _RetryableResponse as e:
+                    delay = _retry_delay(attempt, e.retry_after)
+                except exceptions.NetworkError:
+                    if not can_retry:
+                        raise
+                    delay = _retry_delay(attempt)
+
+                await asyncio.sleep(delay)
+        finally:
+            self.metrics.record_request(time.perf_counter_ns() - started, failed)
+
+    async def _aiohttp_request(self, url: str, body: bytes = None, method: str = 'POST', can_retry: bool = False) -> dict:
+        import aiohttp
+
         try:
-            async with self.session.request(url=url, method=method, headers=self.headers, json=data) as resp:
-                return self._raise_for_status(resp, await resp.text(), method)
+            async with self._session_request(url=url, method=method, headers=self._request_headers(body), data=body) as resp:
+                if can_retry and resp.status in RETRY_STATUSES:
+                    raise _RetryableResponse(resp.headers.get('Retry-After'))
+
+                return self._raise_for_status(resp, resp.status, await resp.read(), method)
         except asyncio.TimeoutError:
             raise exceptions.NotResponding
-        except aiohttp.ServerDisconnectedError:
+        except aiohttp.ClientConnectionError:
+            raise exceptions.NetworkError
+
+    async def _httpx_request(self, url: str, body: bytes = None, method: str = 'POST', can_retry: bool = False) -> dict:
+        import httpx
+
+        try:
+            resp = await self._session_request(method, url, headers=self._request_headers(body), content=body)
+        except httpx.TimeoutException:
+            raise exceptions.NotResponding
+        except httpx.TransportError:  # Includes RemoteProtocolError raised when the server drops the connection
             raise exceptions.NetworkError
 
-    def _request_model(self, url: str, data: dict = None, method: str = 'POST'):
+        if can_retry and resp.status_code in RETRY_STATUSES:
+            raise _RetryableResponse(resp.headers.get('Retry-After'))
+
+        return self._raise_for_status(resp, resp.status_code, resp.content, method)
+
+    def _coalesced_request(self, url: str, body: bytes, method: str, cache_tag: Hashable = None,
+                           generation: int = None) -> bytes:
+        key = (url, body)
+        with self._inflight_lock:
+            call = self._inflight.get(key)
+            is_leader = call is None or not self._is_current(cache_tag, call.generation)
+            if is_leader:
+                call = self._inflight[key] = _InflightRequest(generation)
+
+        if not is_leader:
+            self.metrics.record_deduplicated_request()
+            return call.wait()
+
+        try:
+            call.result = json_dumps(self._request(url, body, method, retry=True))
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._inflight_lock:
+                if self._inflight.get(key) is call:
+                    del self._inflight[key]
+            call.done.set()
+
+    async def _async_coalesced_request(self, url: str, body: bytes, method: str, cache_tag: Hashable = None,
+                                       generation: int = None) -> bytes:
+        key = (url, body)
+        inflight = self._inflight.get(key)
+        if inflight is None or not self._is_current(cache_tag, inflight[1]):
+            task = asyncio.ensure_future(self._async_serialized_request(url, body, method))
+            self._inflight[key] = (task, generation)
+            task.add_done_callback(lambda t: _release_inflight(self._inflight, key, t))
+        else:
+            task = inflight[0]
+            self.metrics.record_deduplicated_request()
+
+        return await asyncio.shield(task)
+
+    async def _async_serialized_request(self, url: str, body: bytes, method: str) -> bytes:
+        return json_dumps(await self._async_request(url, body, method, retry=True))
+
+    def _is_current(self, cache_tag: Hashable, generation: Optional[int]) -> bool:
+        return self.cache is None or self.cache.is_current(cache_tag, generation)
+
+    def _cached_request(self, url: str, body: bytes, method: str, cache_ttl: float = None,
+                        cache_tag: Hashable = None, invalidates: Hashable = None) -> dict:
+        try:
+            if not cache_ttl:
+                return self._request(url, body, method)
+
+            # Taken before the request: a response that races a mutation of the same tag is not cached
+            generation = self.cache.generation() if self.cache is not None else None
+            raw = self.cache.get((url, body)) if self.cache is not None else None
+            if raw is None:
+                raw = self._coalesced_request(url, body, method, cache_tag, generation)
+                if self.cache is not None:
+                    self.cache.set((url, body), raw, cache_ttl, cache_tag, generation)
+            else:
+                self.metrics.record_cached_response()
+
+            return json_loads(raw)
+        finally:
+            if invalidates is not None and self.cache is not None:
+                self.cache.invalidate(invalidates)
+
+    async def _async_cached_request(self, url: str, body: bytes, method: str, cache_ttl: float = None,
+                                    cache_tag: Hashable = None, invalidates: Hashable = None) -> dict:
+        try:
+            if not cache_ttl:
+                return await self._async_request(url, body, method)
+
+            generation = self.cache.generation() if self.cache is not None else None
+            raw = self.cache.get((url, body)) if self.cache is not None else None
+            if raw is None:
+                raw = await self._async_coalesced_request(url, body, method, cache_tag, generation)
+                if self.cache is not None:
+                    self.cache.set((url, body), raw, cache_ttl, cache_tag, generation)
+            else:
+                self.metrics.record_cached_response()
+
+            return json_loads(raw)
+        finally:
+            if invalidates is not None and self.cache is not None:
+                self.cache.invalidate(invalidates)
+
+    def _request_model(self, url: str, data: dict = None, method: str = 'POST', cache_ttl: float = None,
+                       cache_tag: Hashable = None, invalidates: Hashable = None):
+        """
+        :param cache_ttl: Время жизни ответа в кэше в секундах. Передается только для идемпотентных запросов:
+                  одновременные одинаковые запросы объединяются в один и повторяются при сбоях сети
+                  и ответах 502/503/504. Остальные запросы никогда не повторяются.
+        :param cache_tag: Тег, по которому закэшированный ответ будет сброшен.
+        :param invalidates: Тег закэшированных ответов, которые устаревают после выполнения запроса.
+        """
+        body = json_dumps(data) if data is not None else None
+
+        if self.cache is None and not cache_ttl:
+            if self.is_async:
+                return self._async_request(url, body, method)
+
+            return self._request(url, body, method)
+
         if self.is_async:
-            return self._async_request(url, data, method)
+            return self._async_cached_request(url, body, method, cache_ttl, cache_tag, invalidates)
+
+        return self._cached_request(url, body, method, cache_ttl, cache_tag, invalidates)
 
-        return self._request(url, data)
+
+class _RetryableResponse(Exception):
+    """Raised by the transports when a response status is worth retrying"""
+    def __init__(self, retry_after: Optional[str] = None):
+        self.retry_after = retry_after
+        super().__init__(retry_after)
+
+
+def _retry_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), RETRY_AFTER_MAX_DELAY)
+
+    return RETRY_BACKOFF_FACTOR * 2 ** attempt * random.uniform(0.5, 1.5)
+
+
+class _InflightRequest:
+    """Serialized result of a request that concurrent identical callers are waiting for"""
+    __slots__ = ('done', 'result', 'error', 'generation')
+
+    def __init__(self, generation: int = None):
+        self.done = threading.Event()
+        self.generation = generation
+        self.result = None
+        self.error = None
+
+    def wait(self) -> bytes:
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+
+        return self.result
+
+
+def _release_inflight(inflight: dict, key: tuple, task: asyncio.Future) -> None:
+    if inflight.get(key, (None,))[0] is task:  # A newer generation may have replaced the request
+        del inflight[key]
+    if not task.cancelled():
+        task.exception()  # Mark the exception as retrieved if every caller was cancelled
+
+
+def freeze_headers(headers: dict, is_async: bool, http2: bool = False) -> Mapping[str, str]:
+    """Returns read-only headers in the form the session library consumes without copying"""
+    if is_async and not http2:
+        from multidict import CIMultiDict, CIMultiDictProxy
+
+        return CIMultiDictProxy(CIMultiDict(headers))
+
+    return MappingProxyType(headers)
+
+
+def check_transport(is_async: bool, http2: bool, session=None) -> None:
+    """Validates the transport options before a session is created or adopted"""
+    if http2 and not is_async:
+        raise ValueError('HTTP/2 transport is only available for the async client')
+
+    if session is not None and http2 != _is_httpx_client(session):
+        raise ValueError('http2=True requires an httpx.AsyncClient session, other sessions require http2=False')
+
+
+def _is_httpx_client(session) -> bool:
+    try:
+        import httpx
+    except ImportError:
+        return False
+
+    return isinstance(session, httpx.AsyncClient)
+
+
+def create_session(is_async: bool, max_connections: int, http2: bool = False):
+    """Creates a session whose connection pool is sized for a single API host"""
+    if http2:
+        try:
+            import httpx
+        except ImportError as e:
+            raise ImportError('HTTP/2 transport requires httpx, install it with: pip install uzum-payments[http2]') from e
+
+        limits = httpx.Limits(max_connections=max_connections,
+                              max_keepalive_connections=max_connections,
+                              keepalive_expiry=KEEPALIVE_TIMEOUT)
+        return httpx.AsyncClient(http2=True, limits=limits)
+
+    if is_async:
+        import aiohttp
+
+        connector = aiohttp.TCPConnector(limit=max_connections,
+                                         limit_per_host=max_connections,
+                                         ttl_dns_cache=DNS_CACHE_TTL,
+                                         keepalive_timeout=KEEPALIVE_TIMEOUT)
+        return aiohttp.ClientSession(connector=connector, json_serialize=_json_dumps)
+
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=max_connections, pool_maxsize=max_connections)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+_SHARED_SESSIONS = {}
+_SHARED_SESSIONS_LOCK = threading.Lock()
+
+
+def shared_session(max_connections: int) -> 'requests.Session':
+    """
+    Returns a process-wide sync session, created on first use, for clients that were not given a session.
+    Credentials are sent as per-request headers and shared sessions do not keep cookies,
+    so clients of different tenants can share one.
+    """
+    with _SHARED_SESSIONS_LOCK:
+        session = _SHARED_SESSIONS.get(max_connections)
+        if session is None:
+            from http.cookiejar import DefaultCookiePolicy
+
+            session = _SHARED_SESSIONS[max_connections] = create_session(False, max_connections)
+            session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+
+        return session
+
+
+@atexit.register
+def _close_shared_sessions() -> None:
+    with _SHARED_SESSIONS_LOCK:
+        for session in _SHARED_SESSIONS.values():
+            session.close()
+
+
+def _json_dumps(obj) -> str:
+    return json_dumps(obj).decode()
+
+
+def _decode(body: Union[bytes, str]) -> str:
+    return body.decode('utf-8', 'replace') if isinstance(body, bytes) else body
+
+
+_STATUS_CODE_EXCEPTIONS = {
+    400: exceptions.BadRequest,
+    401: exceptions.SignatureError,
+    403: exceptions.FingerprintError,
+    422: exceptions.ValidationError,
+    500: exceptions.InternalServerError,
+}
+
+_ERROR_CODE_THRESHOLDS = (1000, 2000, 3000, 5000)
+_ERROR_CODE_EXCEPTIONS = (
+    exceptions.AuthenticationError,
+    exceptions.ValidationError,
+    exceptions.PaymentErrors,
+    exceptions.InternalError,
+)
 
 
 def raise_error(data: dict, error_code: Union[int, None], status_code: int) -> None:
-    if status_code == 400:
-        raise exceptions.BadRequest(data, error_code)
-    elif status_code == 401:
-        raise exceptions.SignatureError(data, error_code)
-    elif status_code == 403:
-        raise exceptions.FingerprintError(data, error_code)
-    elif status_code == 422:
-        raise exceptions.ValidationError(data, error_code)
-    elif status_code == 500:
-        raise exceptions.InternalServerError(data, error_code)
-
-    if error_code >= 5000:
-        raise exceptions.InternalError(data, error_code)
-    elif error_code >= 3000:
-        raise exceptions.PaymentErrors(data, error_code)
-    elif error_code >= 2000:
-        raise exceptions.ValidationError(data, error_code)
-    elif error_code >= 1000:
-        raise exceptions.AuthenticationError(data, error_code)
-
-    raise exceptions.UnexpectedError(data, error_code)
\ No newline at end of file
+    exception = _STATUS_CODE_EXCEPTIONS.get(status_code)
+    if exception is not None:
+        raise exception(data, error_code)
+
+    if error_code is None:
+        raise exceptions.UnexpectedError(data, error_code)
+
+    index = bisect.bisect_right(_ERROR_CODE_THRESHOLDS, error_code) - 1
+    if index < 0:
+        raise exceptions.UnexpectedError(data, error_code)
+
+    raise _ERROR_CODE_EXCEPTIONS[index](data, error_code)
@@ -1,4 +1,18 @@
 REQUEST_LOG = '{method} {url} has received {text}, has returned {status}'
 
 BASE_CHECKOUT_URL = 'https://checkout-key.inplat-tech.com/api/v1/'
-BASE_RECEIPT_URL = 'https://ofd-key.inplat-tech.com/'
\ No newline at end of file
+BASE_RECEIPT_URL = 'https://ofd-key.inplat-tech.com/'
+
+DEFAULT_MAX_CONNECTIONS = 20
+DNS_CACHE_TTL = 300
+KEEPALIVE_TIMEOUT = 60
+
+CACHE_MAX_SIZE = 1024
+ORDER_STATUS_CACHE_TTL = 2
+OPERATION_STATE_CACHE_TTL = 2
+BINDINGS_CACHE_TTL = 30
+
+DEFAULT_MAX_RETRIES = 3
+RETRY_STATUSES = (502, 503, 504)
+RETRY_BACKOFF_FACTOR = 0.2
+RETRY_AFTER_MAX_DELAY = 5
@@ -1,11 +1,14 @@
+from typing import Union
+
+
 class ApiError(Exception):
     """Represents an exception returned by the remote API."""
     pass
 
 
 class UzumCheckoutException(Exception):
-    def __init__(self, message: dict, code: int = None):
-        self.message = message.get('message') or message
+    def __init__(self, message: Union[dict, str], code: int = None):
+        self.message = (message.get('message') or message) if isinstance(message, dict) else message
         self.code = code
 
 class NotResponding(ApiError):
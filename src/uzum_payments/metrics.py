@@ -0,0 +1,64 @@
+import threading
+from dataclasses import dataclass
+
+
+@dataclass
+class PerformanceMetrics:
+    """Counters of the requests performed by a client"""
+    total_requests: int = 0
+    failed_requests: int = 0
+    cached_responses: int = 0
+    deduplicated_requests: int = 0
+    total_response_time_ns: int = 0
+
+    def __post_init__(self) -> None:
+        # Not a field, so that asdict(), copy.deepcopy() and pickle only see the counters
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        with self._lock:
+            return {name: value for name, value in self.__dict__.items() if name != '_lock'}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def record_request(self, response_time_ns: int, failed: bool = False) -> None:
+        with self._lock:
+            self.total_requests += 1
+            self.failed_requests += failed
+            self.total_response_time_ns += response_time_ns
+
+    def record_cached_response(self) -> None:
+        with self._lock:
+            self.cached_responses += 1
+
+    def record_deduplicated_request(self) -> None:
+        with self._lock:
+            self.deduplicated_requests += 1
+
+    def snapshot(self) -> dict:
+        """
+        Возвращает текущие значения счетчиков и производные метрики в виде словаря.
+        """
+        with self._lock:
+            served = self.total_requests + self.cached_responses + self.deduplicated_requests
+            return {
+                'total_requests': self.total_requests,
+                'failed_requests': self.failed_requests,
+                'cached_responses': self.cached_responses,
+                'deduplicated_requests': self.deduplicated_requests,
+                'total_response_time_seconds': self.total_response_time_ns / 1e9,
+                'average_response_time_seconds': (self.total_response_time_ns / self.total_requests / 1e9
+                                                  if self.total_requests else 0.0),
+                'cache_hit_ratio': self.cached_responses / served if served else 0.0,
+                'deduplication_ratio': self.deduplicated_requests / served if served else 0.0,
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.total_requests = 0
+            self.failed_requests = 0
+            self.cached_responses = 0
+            self.deduplicated_requests = 0
+            self.total_response_time_ns = 0
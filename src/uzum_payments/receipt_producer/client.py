@@ -1,81 +1,102 @@
 import logging
-from typing import Optional, Union
+from typing import TYPE_CHECKING, Optional, Union
 
-import aiohttp
-import requests
+if TYPE_CHECKING:
+    import aiohttp
+    import httpx
+    import requests
 
-from uzum_payments.connection import Connection
-from uzum_payments.const import BASE_RECEIPT_URL
+from uzum_payments.connection import Connection, check_transport, create_session, freeze_headers, shared_session
+from uzum_payments.const import BASE_RECEIPT_URL, DEFAULT_MAX_CONNECTIONS
 
 
 class ReceiptApiClient(Connection):
     """Performs requests to the Uzum Receipt producer API"""
+    __slots__ = ('ssl_client_fingerprint', 'api_key', 'base_url', '_url_health', '_url_fiscal_receipt_generation',
+                 '_url_fiscal_receipt_refund', '_url_save_qr_code_url')
 
     def __init__(self,
                  ssl_client_fingerprint: str = None,
                  api_key: str = None,
                  base_url: Optional[str] = BASE_RECEIPT_URL,
-                 session: Union[aiohttp.ClientSession, requests.Session] = None,
-                 is_async: bool = False, ) -> None:
+                 session: Union['aiohttp.ClientSession', 'requests.Session', 'httpx.AsyncClient'] = None,
+                 is_async: bool = False,
+                 max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 http2: bool = False, ) -> None:
         """
         :param ssl_client_fingerprint: Заголовок выставляется по результату успешного прохождения mTLS.
         :param api_key: Уникальный ключ, который используется для аутентификации запросов.
         :param base_url: URL-адрес API.
-        :param session: Экземпляр сессии.
+        :param session: Экземпляр сессии. По умолчанию синхронные клиенты используют общую для процесса сессию,
+                  которую close() не закрывает.
         :param is_async: Асинхронное выполнение запросов.
+        :param max_connections: Размер пула соединений сессии, создаваемой по умолчанию.
+        :param http2: Использовать httpx.AsyncClient с HTTP/2 вместо aiohttp (только для асинхронного клиента).
         """
 
-        self.headers = {
+        check_transport(is_async, http2, session)
+
+        headers = {
             'Accept': 'application/json',
-            'Accept-Encoding': 'gzip,deflate,sdch',
             'Cache-Control': 'no-cache',
             'Content-Type': 'application/json',
         }
 
         if ssl_client_fingerprint:
             self.ssl_client_fingerprint = ssl_client_fingerprint
-            self.headers.update({'ssl_client_fingerprint': self.ssl_client_fingerprint})
+            headers.update({'ssl_client_fingerprint': self.ssl_client_fingerprint})
 
         if api_key:
             self.api_key = api_key
-            self.headers.update({'X-API-Key': self.api_key})
+            headers.update({'X-API-Key': self.api_key})
+
+        self.headers = freeze_headers(headers, is_async, http2)
 
-        self.base_url = base_url
-        if not self.base_url[-1] == '/':
-            self.base_url += '/'
+        self.base_url = base_url if base_url.endswith('/') else base_url + '/'
 
-        self.session = session or (aiohttp.ClientSession() if is_async else requests.Session())
+        self._url_health = f"{self.base_url}health"
+        self._url_fiscal_receipt_generation = f"{self.base_url}fiscal_receipt_generation"
+        self._url_fiscal_receipt_refund = f"{self.base_url}fiscal_receipt_refund"
+        self._url_save_qr_code_url = f"{self.base_url}save_qr_code_url"
+
+        self.session = session or (create_session(True, max_connections, http2) if is_async
+                                   else shared_session(max_connections))
         self.is_async = is_async
         self.logger = logging.getLogger(__name__)
 
-        Connection.__init__(self, self.session, self.headers, self.logger, self.is_async)
+        Connection.__init__(self, self.session, self.headers, self.logger, self.is_async, http2=http2)
 
     @classmethod
     def Async(cls,
               ssl_client_fingerprint: str = None,
               api_key: str = None,
               base_url: Optional[str] = BASE_RECEIPT_URL,
-              session: Union[aiohttp.ClientSession, requests.Session] = None, ):
+              session: Union['aiohttp.ClientSession', 'requests.Session', 'httpx.AsyncClient'] = None,
+              max_connections: int = DEFAULT_MAX_CONNECTIONS,
+              http2: bool = False, ):
         """
         Returns the client in async mode.
         :param ssl_client_fingerprint: Заголовок выставляется по результату успешного прохождения mTLS.
         :param api_key: Уникальный ключ, который используется для аутентификации запросов.
         :param base_url: URL-адрес API.
         :param session: Экземпляр сессии
+        :param max_connections: Размер пула соединений сессии, создаваемой по умолчанию.
+        :param http2: Использовать httpx.AsyncClient с HTTP/2 вместо aiohttp.
         """
         return cls(ssl_client_fingerprint=ssl_client_fingerprint,
                    api_key=api_key,
                    base_url=base_url,
                    session=session,
-                   is_async=True)
+                   is_async=True,
+                   max_connections=max_connections,
+                   http2=http2)
 
     def health(self, **kwargs) -> dict:
         """
         Проверяет базовую работоспособность сервиса
         https://www.inplat-tech.ru/docs/arp/#tag/Health
         """
-        url = f"{self.base_url}health"
-        return self._request_model(url, data={**kwargs}, method='GET')
+        return self._request_model(self._url_health, data=kwargs or None, method='GET')
 
     def fiscal_receipt_generation(self,
                                   operation_id: str,
@@ -99,7 +120,6 @@ class ReceiptApiClient(Connection):
         :param phone_number: Номер телефона клиента
         :param items: Список товаров
         """
-        url = f"{self.base_url}fiscal_receipt_generation"
         data = {"operation_id": operation_id,
                 "date_time": date_time,
                 "receipt_type": receipt_type,
@@ -110,7 +130,17 @@ class ReceiptApiClient(Connection):
         if payment_id:
             data['payment_id'] = payment_id
 
-        return self._request_model(url, data=data)
+        return self._request_model(self._url_fiscal_receipt_generation, data=data)
+
+    async def fiscal_receipt_generation_batch(self, receipts: list[dict]) -> list:
+        """
+        Конкурентная генерация нескольких фискальных чеков через общую сессию (только для асинхронного клиента).
+        Исключения возвращаются в списке результатов на месте соответствующего чека.
+
+        :param receipts: Список словарей с аргументами fiscal_receipt_generation
+        """
+        self._require_async()  # Before the calls are built: on a sync client they would run immediately
+        return await self.batch(*(self.fiscal_receipt_generation(**receipt) for receipt in receipts))
 
     def fiscal_receipt_refund(self,
                               operation_id: str,
@@ -132,7 +162,6 @@ class ReceiptApiClient(Connection):
         :param card_amount: Сумма оплаты по карте, в тийин
         :param items: Список товаров
         """
-        url = f"{self.base_url}fiscal_receipt_refund"
         data = {"operation_id": operation_id,
                 "date_time": date_time,
                 "receipt_type": receipt_type,
@@ -142,7 +171,7 @@ class ReceiptApiClient(Connection):
         if payment_id:
             data['payment_id'] = payment_id
 
-        return self._request_model(url, data=data)
+        return self._request_model(self._url_fiscal_receipt_refund, data=data)
 
     def save_qr_code_url(self,
                          operation_id: str,
@@ -156,12 +185,11 @@ class ReceiptApiClient(Connection):
         :param qr_code_url: QR ссылка
         :param amount: Сумма в тийин. Следует заполнять только в том случае, если проводитсяадаптивный платеж, то есть часть суммы была оплачена через приложение Uzum, остальная часть наличными средствами.
         """
-        url = f"{self.base_url}save_qr_code_url"
         data = {"operation_id": operation_id,
                 "qr_code_url": qr_code_url,
                 "amount": amount, }
 
-        return self._request_model(url, data=data)
+        return self._request_model(self._url_save_qr_code_url, data=data)
 
     def __repr__(self) -> str:
         return '<Uzum Payments (Receipt Producer) Client async={}>'.format(self.is_async)
@@ -0,0 +1,86 @@
+import asyncio
+import time
+
+ORDER_ID = '5dfa907d-570c-477a-96c1-554638c3f661'
+ORDER_STATUS = b'{"result": {"orderId": "%s", "status": "REGISTERED"}}' % ORDER_ID.encode()
+
+
+class StubResponse:
+    """Response of the stub sessions, usable both as a requests and an aiohttp response"""
+
+    def __init__(self, status: int, body: bytes, headers: dict = None, url: str = ''):
+        self.status = self.status_code = status
+        self.content = body
+        self.headers = headers or {}
+        self.url = url
+
+    async def read(self) -> bytes:
+        return self.content
+
+
+class _Session:
+    def __init__(self, *responses, delay: float = 0):
+        """
+        :param responses: Ответы по порядку: (status, body), (status, body, headers) или исключение.
+                  Последний ответ повторяется для всех следующих запросов.
+        :param delay: Задержка ответа в секундах.
+        """
+        self.responses = list(responses) or [(200, ORDER_STATUS)]
+        self.delay = delay
+        self.calls = []
+
+    def _next_response(self, url: str, method: str, headers, data: bytes) -> StubResponse:
+        self.calls.append((method, url, dict(headers), data))
+        response = self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+        if isinstance(response, Exception):
+            raise response
+
+        return StubResponse(*response[:2], headers=response[2] if len(response) > 2 else None, url=url)
+
+
+class SyncSession(_Session):
+    """Stands in for requests.Session and replays the given responses"""
+
+    def request(self, url: str, method: str, headers, data: bytes = None):
+        time.sleep(self.delay)
+        return _SyncContext(self._next_response(url, method, headers, data))
+
+    def close(self):
+        pass
+
+
+class AsyncSession(_Session):
+    """Stands in for aiohttp.ClientSession and replays the given responses"""
+
+    def request(self, url: str, method: str, headers, data: bytes = None):
+        return _AsyncContext(self, url, method, headers, data)
+
+    async def close(self):
+        pass
+
+
+class _SyncContext:
+    def __init__(self, response: StubResponse):
+        self.response = response
+
+    def __enter__(self) -> StubResponse:
+        return self.response
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class _AsyncContext:
+    def __init__(self, session: AsyncSession, url: str, method: str, headers, data: bytes):
+        self.session = session
+        self.url = url
+        self.method = method
+        self.headers = headers
+        self.data = data
+
+    async def __aenter__(self) -> StubResponse:
+        await asyncio.sleep(self.session.delay)
+        return self.session._next_response(self.url, self.method, self.headers, self.data)
+
+    async def __aexit__(self, *exc_info):
+        return False
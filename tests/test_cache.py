@@ -0,0 +1,172 @@
+import asyncio
+import threading
+import time
+import unittest
+from unittest import mock
+
+import uzum_payments
+from uzum_payments.cache import ResponseCache
+
+from tests.stubs import ORDER_ID, ORDER_STATUS, AsyncSession, SyncSession
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = ResponseCache(max_size=2)
+
+    def test_get_returns_stored_value(self):
+        self.cache.set('key', b'value', ttl=10)
+
+        self.assertEqual(self.cache.get('key'), b'value')
+        self.assertIsNone(self.cache.get('missing'))
+
+    def test_entry_expires_after_ttl(self):
+        with mock.patch('uzum_payments.cache.time.monotonic', return_value=100):
+            self.cache.set('key', b'value', ttl=2)
+
+        with mock.patch('uzum_payments.cache.time.monotonic', return_value=101.9):
+            self.assertEqual(self.cache.get('key'), b'value')
+
+        with mock.patch('uzum_payments.cache.time.monotonic', return_value=102):
+            self.assertIsNone(self.cache.get('key'))
+
+        self.assertEqual(len(self.cache), 0)
+
+    def test_invalidate_drops_only_tagged_entries(self):
+        self.cache.set('a', b'a', ttl=10, tag=('order', 1))
+        self.cache.set('b', b'b', ttl=10, tag=('order', 2))
+
+        self.cache.invalidate(('order', 1))
+
+        self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(self.cache.get('b'), b'b')
+
+    def test_least_recently_used_entry_is_evicted(self):
+        self.cache.set('a', b'a', ttl=10)
+        self.cache.set('b', b'b', ttl=10)
+        self.cache.get('a')
+        self.cache.set('c', b'c', ttl=10)
+
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual(self.cache.get('a'), b'a')
+
+    def test_response_requested_before_invalidation_is_not_stored(self):
+        generation = self.cache.generation()
+        self.cache.invalidate(('order', 1))
+
+        self.cache.set('a', b'stale', ttl=10, tag=('order', 1), generation=generation)
+        self.cache.set('b', b'b', ttl=10, tag=('order', 2), generation=generation)
+
+        self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(self.cache.get('b'), b'b')
+
+    def test_response_requested_after_invalidation_is_stored(self):
+        self.cache.invalidate(('order', 1))
+        self.cache.set('a', b'a', ttl=10, tag=('order', 1), generation=self.cache.generation())
+
+        self.assertEqual(self.cache.get('a'), b'a')
+
+    def test_forgotten_invalidations_are_treated_as_recent(self):
+        generation = self.cache.generation()
+        for order in range(3):
+            self.cache.invalidate(('order', order))
+
+        self.assertFalse(self.cache.is_current(('order', 0), generation))
+        self.assertTrue(self.cache.is_current(('order', 0), self.cache.generation()))
+
+    def test_clear_makes_earlier_generations_stale(self):
+        generation = self.cache.generation()
+        self.cache.clear()
+
+        self.cache.set('a', b'stale', ttl=10, generation=generation)
+
+        self.assertIsNone(self.cache.get('a'))
+
+
+class TestClientCache(unittest.TestCase):
+    def setUp(self):
+        self.session = SyncSession((200, ORDER_STATUS))
+        self.client = uzum_payments.ApiClient(terminal_id='terminal', session=self.session, use_cache=True)
+
+    def test_order_status_is_served_from_cache(self):
+        self.client.get_order_status(order_id=ORDER_ID)
+        order_status = self.client.get_order_status(order_id=ORDER_ID)
+
+        self.assertEqual(order_status['result']['orderId'], ORDER_ID)
+        self.assertEqual(len(self.session.calls), 1)
+
+    def test_cache_hit_returns_a_fresh_dict(self):
+        self.client.get_order_status(order_id=ORDER_ID)['result']['status'] = 'CHANGED'
+
+        self.assertEqual(self.client.get_order_status(order_id=ORDER_ID)['result']['status'], 'REGISTERED')
+
+    def test_mutation_invalidates_order_status(self):
+        self.client.get_order_status(order_id=ORDER_ID)
+        self.client.refund(order_id=ORDER_ID, amount=100)
+        self.client.get_order_status(order_id=ORDER_ID)
+
+        self.assertEqual(len(self.session.calls), 3)
+
+    def test_mutations_are_not_cached(self):
+        self.client.refund(order_id=ORDER_ID, amount=100)
+        self.client.refund(order_id=ORDER_ID, amount=100)
+
+        self.assertEqual(len(self.session.calls), 2)
+
+
+COMPLETED = b'{"result": {"orderId": "%s", "status": "COMPLETED"}}' % ORDER_ID.encode()
+REFUNDED = b'{"result": {"orderId": "%s"}}' % ORDER_ID.encode()
+
+
+class TestCacheInvalidationRace(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        # Responses are taken when a request completes: the refund first, then the slow lookup
+        self.session = AsyncSession((200, REFUNDED), (200, ORDER_STATUS), (200, COMPLETED), delay=0.1)
+        self.client = uzum_payments.ApiClient.Async(terminal_id='terminal', session=self.session, use_cache=True)
+
+    async def start_lookup_then_refund(self) -> asyncio.Task:
+        lookup = asyncio.ensure_future(self.client.get_order_status(order_id=ORDER_ID))
+        await asyncio.sleep(0.01)
+        self.session.delay = 0
+        await self.client.refund(order_id=ORDER_ID, amount=100)
+        return lookup
+
+    async def test_lookup_finishing_after_mutation_is_not_cached(self):
+        lookup = await self.start_lookup_then_refund()
+        await lookup
+
+        order_status = await self.client.get_order_status(order_id=ORDER_ID)
+
+        self.assertEqual(order_status['result']['status'], 'COMPLETED')
+        self.assertEqual(len(self.session.calls), 3)
+
+    async def test_lookup_after_mutation_does_not_join_older_request(self):
+        self.session.responses = [(200, REFUNDED), (200, COMPLETED), (200, ORDER_STATUS)]
+        lookup = await self.start_lookup_then_refund()
+
+        order_status = await self.client.get_order_status(order_id=ORDER_ID)
+        await lookup
+
+        self.assertEqual(order_status['result']['status'], 'COMPLETED')
+        self.assertEqual(self.client.metrics.deduplicated_requests, 0)
+        self.assertEqual(await self.client.get_order_status(order_id=ORDER_ID), order_status)
+
+
+class TestSyncCacheInvalidationRace(unittest.TestCase):
+    def test_lookup_finishing_after_mutation_is_not_cached(self):
+        session = SyncSession((200, REFUNDED), (200, ORDER_STATUS), (200, COMPLETED), delay=0.2)
+        client = uzum_payments.ApiClient(terminal_id='terminal', session=session, use_cache=True)
+
+        lookup = threading.Thread(target=client.get_order_status, kwargs={'order_id': ORDER_ID})
+        lookup.start()
+        time.sleep(0.05)
+        session.delay = 0
+        client.refund(order_id=ORDER_ID, amount=100)
+        lookup.join()
+
+        self.assertEqual(client.get_order_status(order_id=ORDER_ID)['result']['status'], 'COMPLETED')
+        self.assertEqual(len(session.calls), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import asyncio
+import threading
+import unittest
+
+import uzum_payments
+from uzum_payments import exceptions
+
+from tests.stubs import ORDER_ID, ORDER_STATUS, AsyncSession, SyncSession
+
+
+class TestAsyncCoalescing(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.session = AsyncSession((200, ORDER_STATUS), delay=0.05)
+        self.client = uzum_payments.ApiClient.Async(terminal_id='terminal', session=self.session)
+
+    async def test_concurrent_lookups_share_one_request(self):
+        results = await asyncio.gather(*(self.client.get_order_status(order_id=ORDER_ID) for _ in range(5)))
+
+        self.assertEqual(len(self.session.calls), 1)
+        self.assertEqual(self.client.metrics.deduplicated_requests, 4)
+        self.assertEqual(len({id(result) for result in results}), 5)
+        self.assertEqual(self.client._inflight, {})
+
+    async def test_each_caller_gets_its_own_dict(self):
+        first, second = await asyncio.gather(self.client.get_order_status(order_id=ORDER_ID),
+                                             self.client.get_order_status(order_id=ORDER_ID))
+        first['result']['status'] = 'CHANGED'
+
+        self.assertEqual(second['result']['status'], 'REGISTERED')
+
+    async def test_concurrent_mutations_are_not_coalesced(self):
+        await asyncio.gather(*(self.client.refund(order_id=ORDER_ID, amount=100) for _ in range(3)))
+
+        self.assertEqual(len(self.session.calls), 3)
+        self.assertEqual(self.client.metrics.deduplicated_requests, 0)
+
+    async def test_error_is_raised_to_every_caller(self):
+        self.session.responses = [(200, b'{"errorCode": 3001, "message": "Payment failed"}')]
+
+        results = await asyncio.gather(*(self.client.get_order_status(order_id=ORDER_ID) for _ in range(3)),
+                                       return_exceptions=True)
+
+        self.assertEqual(len(self.session.calls), 1)
+        self.assertTrue(all(isinstance(result, exceptions.PaymentErrors) for result in results))
+
+
+class TestSyncCoalescing(unittest.TestCase):
+    def test_concurrent_lookups_share_one_request(self):
+        session = SyncSession((200, ORDER_STATUS), delay=0.1)
+        client = uzum_payments.ApiClient(terminal_id='terminal', session=session)
+        results = []
+
+        threads = [threading.Thread(target=lambda: results.append(client.get_order_status(order_id=ORDER_ID)))
+                   for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(session.calls), 1)
+        self.assertEqual(client.metrics.deduplicated_requests, 4)
+        self.assertEqual(len({id(result) for result in results}), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+
+import uzum_payments
+from uzum_payments import exceptions
+from uzum_payments.connection import raise_error
+
+from tests.stubs import ORDER_ID, SyncSession
+
+
+class TestRaiseError(unittest.TestCase):
+    def assertRaisesFor(self, exception: type, error_code, status_code: int):
+        with self.assertRaises(exception) as context:
+            raise_error({'message': 'Error'}, error_code, status_code)
+
+        self.assertIs(type(context.exception), exception)
+        self.assertEqual(context.exception.code, error_code)
+        self.assertEqual(context.exception.message, 'Error')
+
+    def test_http_status_takes_precedence(self):
+        self.assertRaisesFor(exceptions.BadRequest, 3001, 400)
+        self.assertRaisesFor(exceptions.SignatureError, None, 401)
+        self.assertRaisesFor(exceptions.FingerprintError, None, 403)
+        self.assertRaisesFor(exceptions.ValidationError, None, 422)
+        self.assertRaisesFor(exceptions.InternalServerError, None, 500)
+
+    def test_error_code_ranges(self):
+        self.assertRaisesFor(exceptions.AuthenticationError, 1000, 200)
+        self.assertRaisesFor(exceptions.AuthenticationError, 1999, 200)
+        self.assertRaisesFor(exceptions.ValidationError, 2001, 200)
+        self.assertRaisesFor(exceptions.PaymentErrors, 3001, 200)
+        self.assertRaisesFor(exceptions.PaymentErrors, 4001, 200)
+        self.assertRaisesFor(exceptions.InternalError, 5001, 200)
+
+    def test_unknown_errors(self):
+        self.assertRaisesFor(exceptions.UnexpectedError, None, 200)
+        self.assertRaisesFor(exceptions.UnexpectedError, None, 502)
+        self.assertRaisesFor(exceptions.UnexpectedError, 999, 200)
+
+    def test_null_message_falls_back_to_payload(self):
+        with self.assertRaises(exceptions.PaymentErrors) as context:
+            raise_error({'message': None, 'errorCode': 3001}, 3001, 200)
+
+        self.assertEqual(context.exception.message, {'message': None, 'errorCode': 3001})
+
+
+class TestResponseErrors(unittest.TestCase):
+    def get_order_status(self, status: int, body: bytes) -> dict:
+        client = uzum_payments.ApiClient(terminal_id='terminal', session=SyncSession((status, body)), max_retries=0)
+        return client.get_order_status(order_id=ORDER_ID)
+
+    def test_error_code_in_successful_response(self):
+        with self.assertRaises(exceptions.PaymentErrors) as context:
+            self.get_order_status(200, b'{"errorCode": 3001, "message": "Payment failed"}')
+
+        self.assertEqual(context.exception.code, 3001)
+        self.assertEqual(context.exception.message, 'Payment failed')
+
+    def test_non_json_error_page_keeps_http_status(self):
+        with self.assertRaises(exceptions.InternalServerError):
+            self.get_order_status(500, b'<html>Internal Server Error</html>')
+
+        with self.assertRaises(exceptions.UnexpectedError) as context:
+            self.get_order_status(504, b'<html>Gateway Timeout</html>')
+
+        self.assertIn('504', context.exception.message)
+
+    def test_non_json_successful_response(self):
+        with self.assertRaises(exceptions.UnexpectedError):
+            self.get_order_status(200, b'<html></html>')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+from unittest import mock
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+import uzum_payments
+from uzum_payments import exceptions
+
+from tests.stubs import ORDER_ID, ORDER_STATUS
+
+
+@unittest.skipIf(httpx is None, 'httpx is not installed')
+@mock.patch('uzum_payments.connection._retry_delay', return_value=0)
+class TestHttpxTransport(unittest.IsolatedAsyncioTestCase):
+    def client(self, *responses) -> uzum_payments.ApiClient:
+        """
+        :param responses: Ответы по порядку: (status, body) или исключение. Последний ответ повторяется.
+        """
+        self.requests = []
+        responses = list(responses)
+
+        def handler(request: 'httpx.Request') -> 'httpx.Response':
+            self.requests.append(request)
+            response = responses.pop(0) if len(responses) > 1 else responses[0]
+            if isinstance(response, Exception):
+                raise response
+
+            return httpx.Response(response[0], content=response[1])
+
+        session = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return uzum_payments.ApiClient.Async(terminal_id='terminal', session=session, http2=True)
+
+    async def asyncTearDown(self):
+        await self.api.close()
+
+    async def test_successful_response(self, _):
+        self.api = self.client((200, ORDER_STATUS))
+
+        order_status = await self.api.get_order_status(order_id=ORDER_ID)
+
+        self.assertEqual(order_status['result']['orderId'], ORDER_ID)
+        self.assertEqual(self.requests[0].headers['X-Terminal-Id'], 'terminal')
+
+    async def test_dropped_connection_is_a_network_error(self, _):
+        self.api = self.client(httpx.RemoteProtocolError('Server disconnected without sending a response.'))
+
+        with self.assertRaises(exceptions.NetworkError):
+            await self.api.refund(order_id=ORDER_ID, amount=100)
+
+        self.assertEqual(len(self.requests), 1)
+
+    async def test_lookup_is_retried_on_dropped_connection(self, _):
+        self.api = self.client(httpx.RemoteProtocolError('Server disconnected'), (503, b'{}'), (200, ORDER_STATUS))
+
+        await self.api.get_order_status(order_id=ORDER_ID)
+
+        self.assertEqual(len(self.requests), 3)
+
+    async def test_timeout_is_not_responding(self, _):
+        self.api = self.client(httpx.ReadTimeout('Timed out'))
+
+        with self.assertRaises(exceptions.NotResponding):
+            await self.api.refund(order_id=ORDER_ID, amount=100)
+
+    async def test_error_page_is_dispatched_by_status(self, _):
+        self.api = self.client((500, b'<html>Internal Server Error</html>'))
+
+        with self.assertRaises(exceptions.InternalServerError):
+            await self.api.refund(order_id=ORDER_ID, amount=100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import copy
+import dataclasses
+import pickle
+import unittest
+
+import uzum_payments
+from uzum_payments import PerformanceMetrics, exceptions
+
+from tests.stubs import ORDER_ID, ORDER_STATUS, SyncSession
+
+
+class TestPerformanceMetrics(unittest.TestCase):
+    def setUp(self):
+        self.metrics = PerformanceMetrics()
+
+    def test_empty_snapshot(self):
+        self.assertEqual(self.metrics.snapshot(), {
+            'total_requests': 0,
+            'failed_requests': 0,
+            'cached_responses': 0,
+            'deduplicated_requests': 0,
+            'total_response_time_seconds': 0.0,
+            'average_response_time_seconds': 0.0,
+            'cache_hit_ratio': 0.0,
+            'deduplication_ratio': 0.0,
+        })
+
+    def test_snapshot_derives_ratios(self):
+        self.metrics.record_request(1_000_000_000)
+        self.metrics.record_request(3_000_000_000, failed=True)
+        self.metrics.record_cached_response()
+        self.metrics.record_deduplicated_request()
+
+        snapshot = self.metrics.snapshot()
+
+        self.assertEqual(snapshot['total_requests'], 2)
+        self.assertEqual(snapshot['failed_requests'], 1)
+        self.assertEqual(snapshot['total_response_time_seconds'], 4.0)
+        self.assertEqual(snapshot['average_response_time_seconds'], 2.0)
+        self.assertEqual(snapshot['cache_hit_ratio'], 0.25)
+        self.assertEqual(snapshot['deduplication_ratio'], 0.25)
+
+    def test_metrics_can_be_converted_and_copied(self):
+        self.metrics.record_request(1_000, failed=True)
+        self.metrics.record_cached_response()
+
+        self.assertEqual(dataclasses.asdict(self.metrics), {
+            'total_requests': 1,
+            'failed_requests': 1,
+            'cached_responses': 1,
+            'deduplicated_requests': 0,
+            'total_response_time_ns': 1_000,
+        })
+
+        for restored in (copy.deepcopy(self.metrics), pickle.loads(pickle.dumps(self.metrics))):
+            self.assertEqual(restored, self.metrics)
+            restored.record_request(1_000)
+            self.assertEqual(restored.total_requests, 2)
+            self.assertEqual(self.metrics.total_requests, 1)
+
+    def test_reset(self):
+        self.metrics.record_request(1_000)
+        self.metrics.record_cached_response()
+        self.metrics.reset()
+
+        self.assertEqual(self.metrics, PerformanceMetrics())
+
+
+class TestClientMetrics(unittest.TestCase):
+    def test_client_records_requests(self):
+        session = SyncSession((200, ORDER_STATUS), (200, b'{"errorCode": 3001}'), (200, ORDER_STATUS))
+        client = uzum_payments.ApiClient(terminal_id='terminal', session=session, use_cache=True)
+
+        client.get_order_status(order_id=ORDER_ID)
+        client.get_order_status(order_id=ORDER_ID)
+        with self.assertRaises(exceptions.PaymentErrors):
+            client.refund(order_id=ORDER_ID, amount=100)
+
+        snapshot = client.metrics.snapshot()
+
+        self.assertEqual(snapshot['total_requests'], 2)
+        self.assertEqual(snapshot['failed_requests'], 1)
+        self.assertEqual(snapshot['cached_responses'], 1)
+        self.assertGreater(snapshot['total_response_time_seconds'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
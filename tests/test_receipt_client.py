@@ -0,0 +1,138 @@
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import MappingProxyType
+from unittest import mock
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+import uzum_payments
+from uzum_payments import exceptions
+from uzum_payments.connection import freeze_headers
+
+from tests.stubs import AsyncSession, SyncSession
+
+RECEIPT = {
+    'operation_id': 'operation',
+    'date_time': '2024-01-01T00:00:00',
+    'cash_amount': 0,
+    'card_amount': 100,
+    'phone_number': '998901234567',
+    'items': [],
+}
+
+
+class TestReceiptBatch(unittest.IsolatedAsyncioTestCase):
+    async def test_batch_returns_results_and_errors_in_order(self):
+        session = AsyncSession((200, b'{"status": "ok"}'), (200, b'{"errorCode": 3001}'))
+        client = uzum_payments.ReceiptApiClient.Async(session=session)
+
+        results = await client.fiscal_receipt_generation_batch([RECEIPT, RECEIPT])
+
+        self.assertEqual(results[0], {'status': 'ok'})
+        self.assertIsInstance(results[1], exceptions.PaymentErrors)
+        self.assertEqual(len(session.calls), 2)
+
+    async def test_batch_is_rejected_on_sync_client(self):
+        session = SyncSession()
+        client = uzum_payments.ReceiptApiClient(session=session)
+
+        with self.assertRaises(ValueError):
+            await client.fiscal_receipt_generation_batch([RECEIPT])
+
+        with self.assertRaises(ValueError):
+            await client.batch()
+
+        self.assertEqual(session.calls, [])
+
+
+class TestHttp2Options(unittest.TestCase):
+    def test_http2_requires_async_client(self):
+        with self.assertRaises(ValueError):
+            uzum_payments.ReceiptApiClient(http2=True)
+
+        with self.assertRaises(ValueError):
+            uzum_payments.ApiClient(terminal_id='terminal', http2=True)
+
+    def test_session_must_match_http2(self):
+        with self.assertRaises(ValueError):
+            uzum_payments.ReceiptApiClient.Async(session=AsyncSession(), http2=True)
+
+        with self.assertRaises(ValueError):
+            uzum_payments.ApiClient.Async(terminal_id='terminal', session=AsyncSession(), http2=True)
+
+    @unittest.skipIf(httpx is None, 'httpx is not installed')
+    def test_httpx_session_is_checked_by_type(self):
+        class Client(httpx.AsyncClient):
+            pass
+
+        uzum_payments.ReceiptApiClient.Async(session=Client(), http2=True)
+
+        with self.assertRaises(ValueError):
+            uzum_payments.ReceiptApiClient.Async(session=httpx.Client(), http2=True)
+
+        with self.assertRaises(ValueError):
+            uzum_payments.ReceiptApiClient.Async(session=httpx.AsyncClient())
+
+    def test_http2_headers_do_not_need_multidict(self):
+        self.assertIsInstance(freeze_headers({'Accept': 'application/json'}, is_async=True, http2=True),
+                              MappingProxyType)
+
+
+class _CookieHandler(BaseHTTPRequestHandler):
+    """Sets a session cookie and echoes back the cookies it received"""
+
+    def do_GET(self):
+        body = b'{"cookie": "%s"}' % (self.headers.get('Cookie') or '').encode()
+        self.send_response(200)
+        self.send_header('Set-Cookie', 'session=tenant; Path=/')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestSharedSession(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), _CookieHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = 'http://127.0.0.1:%d/' % cls.server.server_address[1]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_clients_of_different_tenants_share_one_session(self):
+        first = uzum_payments.ReceiptApiClient(api_key='first', base_url=self.base_url)
+        second = uzum_payments.ReceiptApiClient(api_key='second', ssl_client_fingerprint='fingerprint',
+                                                base_url=self.base_url)
+
+        self.assertIs(first.session, second.session)
+
+    def test_shared_session_does_not_keep_cookies(self):
+        first = uzum_payments.ReceiptApiClient(api_key='first', base_url=self.base_url)
+        second = uzum_payments.ReceiptApiClient(api_key='second', base_url=self.base_url)
+
+        first.health()
+
+        self.assertEqual(second.health(), {'cookie': ''})
+        self.assertEqual(len(second.session.cookies), 0)
+
+    def test_close_keeps_shared_session_open(self):
+        client = uzum_payments.ReceiptApiClient(base_url=self.base_url)
+
+        with mock.patch.object(client.session, 'close') as close:
+            client.close()
+
+        close.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import unittest
+from unittest import mock
+
+import aiohttp
+import requests
+
+import uzum_payments
+from uzum_payments import exceptions
+from uzum_payments.connection import _retry_delay
+from uzum_payments.const import RETRY_AFTER_MAX_DELAY
+
+from tests.stubs import ORDER_ID, ORDER_STATUS, AsyncSession, SyncSession
+
+UNAVAILABLE = (503, b'{}')
+OK = (200, ORDER_STATUS)
+
+
+@mock.patch('uzum_payments.connection._retry_delay', return_value=0)
+class TestSyncRetries(unittest.TestCase):
+    def client(self, *responses, max_retries=3):
+        self.session = SyncSession(*responses)
+        return uzum_payments.ApiClient(terminal_id='terminal', session=self.session, max_retries=max_retries)
+
+    def test_lookup_is_retried_on_unavailable(self, _):
+        order_status = self.client(UNAVAILABLE, UNAVAILABLE, OK).get_order_status(order_id=ORDER_ID)
+
+        self.assertEqual(order_status['result']['orderId'], ORDER_ID)
+        self.assertEqual(len(self.session.calls), 3)
+
+    def test_lookup_is_retried_on_network_error(self, _):
+        self.client(requests.ConnectionError(), OK).get_bindings(client_id='client')
+
+        self.assertEqual(len(self.session.calls), 2)
+
+    def test_lookup_gives_up_after_max_retries(self, _):
+        with self.assertRaises(exceptions.UnexpectedError):
+            self.client(UNAVAILABLE, max_retries=2).get_operation_state(operation_id='operation')
+
+        self.assertEqual(len(self.session.calls), 3)
+
+    def test_negative_max_retries_is_rejected(self, _):
+        with self.assertRaises(ValueError):
+            self.client(OK, max_retries=-1)
+
+    def test_zero_max_retries_makes_a_single_attempt(self, _):
+        with self.assertRaises(exceptions.UnexpectedError):
+            self.client(UNAVAILABLE, OK, max_retries=0).get_order_status(order_id=ORDER_ID)
+
+        self.assertEqual(len(self.session.calls), 1)
+
+    def test_mutations_are_not_retried(self, _):
+        client = self.client(UNAVAILABLE, OK)
+        for mutation in (lambda: client.refund(order_id=ORDER_ID, amount=100),
+                         lambda: client.complete(order_id=ORDER_ID, amount=100),
+                         lambda: client.reverse(order_id=ORDER_ID, amount=100),
+                         lambda: client.merchant_pay(process_data={}, order_id=ORDER_ID)):
+            self.session.responses = [UNAVAILABLE, OK]
+            self.session.calls.clear()
+
+            with self.assertRaises(exceptions.UnexpectedError):
+                mutation()
+
+            self.assertEqual(len(self.session.calls), 1)
+
+    def test_mutation_is_not_retried_on_network_error(self, _):
+        with self.assertRaises(exceptions.NetworkError):
+            self.client(requests.ConnectionError(), OK).refund(order_id=ORDER_ID, amount=100)
+
+        self.assertEqual(len(self.session.calls), 1)
+
+
+@mock.patch('uzum_payments.connection._retry_delay', return_value=0)
+class TestAsyncRetries(unittest.IsolatedAsyncioTestCase):
+    def client(self, *responses):
+        self.session = AsyncSession(*responses)
+        return uzum_payments.ApiClient.Async(terminal_id='terminal', session=self.session)
+
+    async def test_lookup_is_retried_on_unavailable(self, _):
+        order_status = await self.client(UNAVAILABLE, UNAVAILABLE, OK).get_order_status(order_id=ORDER_ID)
+
+        self.assertEqual(order_status['result']['orderId'], ORDER_ID)
+        self.assertEqual(len(self.session.calls), 3)
+
+    async def test_lookup_is_retried_on_server_disconnect(self, _):
+        await self.client(aiohttp.ServerDisconnectedError(), OK).get_order_status(order_id=ORDER_ID)
+
+        self.assertEqual(len(self.session.calls), 2)
+
+    async def test_mutation_is_not_retried_on_unavailable(self, _):
+        with self.assertRaises(exceptions.UnexpectedError):
+            await self.client(UNAVAILABLE, OK).refund(order_id=ORDER_ID, amount=100)
+
+        self.assertEqual(len(self.session.calls), 1)
+
+    async def test_mutation_is_not_retried_on_server_disconnect(self, _):
+        with self.assertRaises(exceptions.NetworkError):
+            await self.client(aiohttp.ServerDisconnectedError(), OK).merchant_pay(process_data={}, order_id=ORDER_ID)
+
+        self.assertEqual(len(self.session.calls), 1)
+
+
+class TestRetryDelay(unittest.TestCase):
+    def test_retry_after_is_honoured(self):
+        self.assertEqual(_retry_delay(0, '1'), 1)
+
+    def test_retry_after_is_capped(self):
+        self.assertEqual(_retry_delay(0, '3600'), RETRY_AFTER_MAX_DELAY)
+
+    def test_backoff_grows_with_attempts(self):
+        self.assertLess(_retry_delay(0), _retry_delay(5))
+
+
+if __name__ == '__main__':
+    unittest.main()
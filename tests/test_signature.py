@@ -0,0 +1,122 @@
+import base64
+import hashlib
+import json
+import os
+import tempfile
+import unittest
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+
+import uzum_payments
+
+from tests.stubs import ORDER_ID, AsyncSession, SyncSession
+
+
+def write_private_key(path: str, password: bytes = None) -> ec.EllipticCurvePrivateKey:
+    private_key = ec.generate_private_key(ec.SECP256R1())
+    encryption = (serialization.BestAvailableEncryption(password) if password
+                  else serialization.NoEncryption())
+    with open(path, 'wb') as key_file:
+        key_file.write(private_key.private_bytes(serialization.Encoding.PEM,
+                                                 serialization.PrivateFormat.PKCS8,
+                                                 encryption))
+
+    return private_key
+
+
+class TestPrivateKey(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'private.pem')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def client(self, password: bytes = None) -> uzum_payments.ApiClient:
+        return uzum_payments.ApiClient(terminal_id='terminal', signature_private_key=self.path,
+                                       signature_private_key_password=password, session=SyncSession())
+
+    def test_key_is_loaded_once_per_client(self):
+        private_key = write_private_key(self.path, password=b'password')
+
+        client = self.client(password=b'password')
+        os.remove(self.path)
+
+        self.assertEqual(client._private_key.private_numbers(), private_key.private_numbers())
+        client.refund(order_id='order', amount=100)
+
+    def test_new_client_picks_up_rotated_key(self):
+        write_private_key(self.path)
+        client = self.client()
+
+        rotated_key = write_private_key(self.path)
+
+        self.assertEqual(self.client()._private_key.private_numbers(), rotated_key.private_numbers())
+        self.assertNotEqual(client._private_key.private_numbers(), rotated_key.private_numbers())
+
+
+class TestSignature(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'private.pem')
+        self.public_key = write_private_key(self.path).public_key()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def assertSigned(self, headers: dict, body: bytes):
+        signature = base64.b64decode(headers['X-Signature'])
+        digest = hashlib.sha256(body).hexdigest().encode()
+
+        self.public_key.verify(signature, digest, ec.ECDSA(hashes.SHA256()))
+
+    def test_signature_covers_the_sent_body(self):
+        session = SyncSession()
+        client = uzum_payments.ApiClient(terminal_id='terminal', signature_private_key=self.path, session=session)
+
+        client.refund(order_id=ORDER_ID, amount=100)
+        client.get_order_status(order_id=ORDER_ID)
+
+        for _, _, headers, body in session.calls:
+            self.assertSigned(headers, body)
+
+        self.assertEqual(json.loads(session.calls[0][3]), {'orderId': ORDER_ID, 'amount': 100})
+        self.assertNotIn('X-Signature', client.headers)
+
+    async def test_async_signature_covers_the_sent_body(self):
+        session = AsyncSession()
+        client = uzum_payments.ApiClient.Async(terminal_id='terminal', signature_private_key=self.path,
+                                               session=session)
+
+        await client.complete(order_id=ORDER_ID, amount=100)
+
+        _, _, headers, body = session.calls[0]
+        self.assertSigned(headers, body)
+        self.assertNotIn('X-Signature', client.headers)
+
+    def test_each_body_gets_its_own_signature(self):
+        session = SyncSession()
+        client = uzum_payments.ApiClient(terminal_id='terminal', signature_private_key=self.path, session=session)
+
+        client.refund(order_id=ORDER_ID, amount=100)
+        client.refund(order_id=ORDER_ID, amount=200)
+
+        first, second = session.calls
+        self.assertSigned(second[2], second[3])
+        with self.assertRaises(InvalidSignature):
+            self.assertSigned(first[2], second[3])
+
+    def test_client_without_key_sends_no_signature(self):
+        session = SyncSession()
+        client = uzum_payments.ApiClient(terminal_id='terminal', session=session)
+
+        client.refund(order_id=ORDER_ID, amount=100)
+
+        self.assertNotIn('X-Signature', session.calls[0][2])
+        self.assertNotIn('X-Signature', client.headers)
+
+
+if __name__ == '__main__':
+    unittest.main()